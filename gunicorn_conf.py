@@ -0,0 +1,40 @@
+"""
+Gunicorn configuration for the translation server.
+
+Run with:
+    gunicorn -c gunicorn_conf.py server:app
+
+Each worker process loads its own copy of the translation model, so the
+default is a single process with many threads. Requests spend most of their
+time waiting on the model's batch scheduler, which threads handle well.
+Set GUNICORN_WORKER_CLASS=gevent for upstream-bound (non-model) workloads.
+
+On many-core CPUs, several single-worker instances pinned to disjoint cores
+(numactl --physcpubind, OMP_NUM_THREADS=cores per instance) behind a load
+balancer give more throughput than one instance using every core.
+
+To run several workers on one box without each loading its own copy, set
+PRELOAD_MODEL=true and GUNICORN_PRELOAD=true: the master loads the model
+before forking and workers share the weights copy-on-write. CPU only - CUDA
+cannot be initialized before fork.
+"""
+import os
+
+bind = f"0.0.0.0:{os.environ.get('PORT', 3001)}"
+
+# --- Workers ---
+worker_class = os.environ.get("GUNICORN_WORKER_CLASS", "gthread")
+workers = int(os.environ.get("GUNICORN_WORKERS", 1))
+threads = int(os.environ.get("GUNICORN_THREADS", 32))
+worker_connections = 1000
+preload_app = os.environ.get("GUNICORN_PRELOAD", "false").lower() == "true"
+
+# First request may trigger a multi-minute model load
+timeout = int(os.environ.get("GUNICORN_TIMEOUT", 900))
+graceful_timeout = 30
+keepalive = 5
+
+# --- Logging ---
+accesslog = "-"
+errorlog = "-"
+loglevel = os.environ.get("LOG_LEVEL", "info").lower()
@@ -1,84 +1,177 @@
 import os
+import io
 import time
 import zipfile
 import tempfile
 import shutil
+import threading
+import uuid
+from concurrent.futures import ThreadPoolExecutor
 from flask import Flask, jsonify, request
+from flask.json.provider import JSONProvider
 from flask_cors import CORS
+from flask_limiter import Limiter
+from flask_limiter.util import get_remote_address
 from dotenv import load_dotenv
+import orjson
+import hmac
 import logging
+import queue
+import atexit
+from logging.handlers import QueueHandler, QueueListener
 import requests
-from utils import language_translate, detect_language
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from utils import cached_language_translate, cached_detect_language, initialize_model, redis_call
 # from netlify_py import NetlifyPy  # Has Windows compatibility issues
 
 # --- Basic Logging Setup ---
-logging.basicConfig(level=logging.INFO)
+logging.basicConfig(level=os.getenv("LOG_LEVEL", "INFO").upper())
 logger = logging.getLogger(__name__)
 
+# Hand records to a background listener so request threads never block on stdout
+_log_queue = queue.Queue(-1)
+_root_logger = logging.getLogger()
+_log_listener = QueueListener(_log_queue, *_root_logger.handlers, respect_handler_level=True)
+_root_logger.handlers = [QueueHandler(_log_queue)]
+_log_listener.start()
+atexit.register(lambda: _log_listener.stop())
+
+def _restart_log_listener():
+    # Threads don't survive fork (gunicorn --preload); give each child its own listener
+    global _log_listener
+    _log_listener = QueueListener(_log_queue, *_log_listener.handlers, respect_handler_level=True)
+    _log_listener.start()
+
+os.register_at_fork(after_in_child=_restart_log_listener)
+
 load_dotenv()
 
+# --- JSON Handling ---
+class OrjsonProvider(JSONProvider):
+    """
+    JSON provider backed by orjson. Used by request.get_json() and jsonify(),
+    and writes response bodies as UTF-8 bytes without an intermediate str.
+    """
+    def dumps(self, obj, **kwargs):
+        return orjson.dumps(obj).decode()
+
+    def loads(self, s, **kwargs):
+        return orjson.loads(s)
+
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        return self._app.response_class(orjson.dumps(obj), mimetype="application/json")
+
 # --- Environment and Configuration ---
 app = Flask(__name__)
+app.json = OrjsonProvider(app)
 CORS(app)
 # USERDB_BASE_URL is no longer required since we're not doing external validation
 # USERDB_BASE_URL = os.getenv("USERDB_BASE_URL")
 
+# Optional shared secret; when set, API keys must match it exactly
+EXPECTED_API_KEY = os.getenv("API_KEY")
+
+# In-process rate limiting per client address. API_KEY is one shared secret,
+# so keying on it would put every client in one bucket (and log the secret)
+limiter = Limiter(
+    get_remote_address,
+    app=app,
+    default_limits=[os.getenv("RATE_LIMIT", "60/minute")],
+    storage_uri="memory://",
+)
+
+# Shared session so Netlify calls reuse TCP/TLS connections across deploys.
+# urllib3 does not retry POSTs on status codes by default, so only
+# connection-level failures are retried for the deploy calls.
+_netlify_session = requests.Session()
+_netlify_session.mount("https://", HTTPAdapter(
+    pool_connections=16,
+    pool_maxsize=64,
+    max_retries=Retry(total=3, backoff_factor=0.2, status_forcelist=[502, 503, 504]),
+))
+
 # --- API Key Validation Function ---
 def is_api_key_valid(api_key: str):
     """
-    Validates that API key is present and non-empty.
+    Validates that API key is present and non-empty, and matches API_KEY when configured.
     Returns a tuple of (is_valid, error_message)
     """
-    if not api_key or not isinstance(api_key, str) or not api_key.strip():
+    # isspace() is False for "", and avoids allocating a stripped copy
+    if type(api_key) is not str or not api_key or api_key.isspace():
         return False, "API key is required"
     
+    if EXPECTED_API_KEY and not hmac.compare_digest(api_key.encode(), EXPECTED_API_KEY.encode()):
+        return False, "Invalid API key"
+    
     return True, ""
 
+def get_request_api_key():
+    """
+    Returns the API key from the X-API-Key header, falling back to the JSON body.
+    The header is checked first so header-authenticated requests are rejected
+    without parsing the body.
+    """
+    api_key = request.headers.get('X-API-Key')
+    if api_key is None:
+        data = request.get_json(silent=True)
+        if isinstance(data, dict):
+            api_key = data.get('api_key')
+    return api_key
+
+@app.before_request
+def require_api_key():
+    """Rejects POSTs to /api/* without a valid API key before they reach a handler."""
+    if request.method != 'POST' or not request.path.startswith('/api/'):
+        return None
+    
+    is_valid, error_message = is_api_key_valid(get_request_api_key())
+    if not is_valid:
+        return jsonify({"error": f"API key validation failed: {error_message}"}), 401
+    return None
+
 # --- Translation Endpoint ---
 @app.route('/api/translate', methods=['POST'])
 def translate_text():
     """
-    Translation endpoint that validates API key and translates text.
-    Accepts an optional target_language parameter.
+    Translation endpoint that translates text. The API key is checked by require_api_key.
+    Accepts optional target_language and source_language parameters.
     Expected request body:
     {
         "text": "text to translate",
         "api_key": "your_api_key",
-        "target_language": "hi" (optional, defaults to "en-IN")
+        "target_language": "hi" (optional, defaults to "en-IN"),
+        "source_language": "en" (optional, skips auto-detection when provided)
     }
     """
-    print(f"--- Translate Request ---")
     try:
         data = request.get_json()
-        print(f"Request data: {data}")
+        logger.debug("Translate request: %s", data)
         if not data:
             return jsonify({"error": "Request body is required"}), 400
         
         text = data.get('text')
-        api_key = data.get('api_key')
         target_language = data.get('target_language', 'en-IN') # Default to en-IN
+        source_language = data.get('source_language')
         
         if not text:
             return jsonify({"error": "'text' field is required"}), 400
-        if not api_key:
-            return jsonify({"error": "'api_key' field is required"}), 400
-        
-        is_valid, error_message = is_api_key_valid(api_key)
-        if not is_valid:
-            return jsonify({"error": f"API key validation failed: {error_message}"}), 401
         
         try:
-            translated_text = language_translate(text, target_language=target_language)
+            translated_text, cache_hit = cached_language_translate(
+                text, target_language=target_language, source_language=source_language
+            )
             
             response_data = {
                 "success": True,
                 "original_text": text,
                 "translated_text": translated_text,
-                "source_language": "auto-detected",
-                "target_language": target_language
+                "source_language": source_language or "auto-detected",
+                "target_language": target_language,
+                "cache_hit": cache_hit
             }
-            print(f"--- Translate Response ---")
-            print(f"Response data: {response_data}")
+            logger.debug("Translate response: %s", response_data)
             return jsonify(response_data), 200
             
         except Exception as translation_error:
@@ -93,42 +186,33 @@ def translate_text():
 @app.route('/api/detect-language', methods=['POST'])
 def detect_language_endpoint():
     """
-    Detects the language of the input text after validating the API key.
+    Detects the language of the input text. The API key is checked by require_api_key.
     Expected request body:
     {
         "text": "text to analyze",
         "api_key": "your_api_key"
     }
     """
-    print(f"--- Detect Language Request ---")
     try:
         data = request.get_json()
-        print(f"Request data: {data}")
+        logger.debug("Detect language request: %s", data)
         if not data:
             return jsonify({"error": "Request body is required"}), 400
 
         text = data.get('text')
-        api_key = data.get('api_key')
 
         if not text:
             return jsonify({"error": "'text' field is required"}), 400
-        if not api_key:
-            return jsonify({"error": "'api_key' field is required"}), 400
-
-        is_valid, error_message = is_api_key_valid(api_key)
-        if not is_valid:
-            return jsonify({"error": f"API key validation failed: {error_message}"}), 401
 
         try:
-            language_code = detect_language(text)
-            print(language_code)
+            language_code, cache_hit = cached_detect_language(text)
             response_data = {
                 "success": True,
                 "text": text,
-                "language_code": language_code
+                "language_code": language_code,
+                "cache_hit": cache_hit
             }
-            print(f"--- Detect Language Response ---")
-            print(f"Response data: {response_data}")
+            logger.debug("Detect language response: %s", response_data)
             return jsonify(response_data), 200
         
         except Exception as detection_error:
@@ -140,132 +224,172 @@ def detect_language_endpoint():
         return jsonify({"error": "Internal server error"}), 500
 
 # --- Netlify Deployment Endpoint ---
-@app.route('/deploy', methods=['POST'])
-def deploy_to_netlify():
-    """
-    Deploys a zipped website to Netlify by extracting the zip and using file digest method.
-    Creates a new site for each deployment.
-    Requires API key validation for security.
-    """
-    logger.info("--- Netlify Deployment Request ---")
+# Already-compressed formats gain nothing from deflate, so they are stored as-is
+PRECOMPRESSED_EXTENSIONS = (
+    '.png', '.jpg', '.jpeg', '.gif', '.webp', '.woff', '.woff2',
+    '.mp4', '.webm', '.zip', '.gz', '.br'
+)
 
-    # Validate API key
-    api_key = request.form.get('api_key') or request.headers.get('X-API-Key')
-    if api_key:
-        is_valid, error_message = is_api_key_valid(api_key)
-        if not is_valid:
-            return jsonify({"error": f"API key validation failed: {error_message}"}), 401
+# Deployments run on a small thread pool so /deploy returns without holding a worker
+DEPLOY_JOB_TTL = int(os.getenv("DEPLOY_JOB_TTL", 3600))
+# (connect, read) seconds for Netlify calls so a stalled request can't hold a deploy worker forever
+NETLIFY_TIMEOUT = (10, int(os.getenv("NETLIFY_TIMEOUT", 300)))
+UPLOAD_SPOOL_MAX_SIZE = int(os.getenv("UPLOAD_SPOOL_MAX_SIZE", 32 * 1024 * 1024))
+_deploy_pool = ThreadPoolExecutor(max_workers=int(os.getenv("DEPLOY_WORKERS", 4)), thread_name_prefix="deploy")
+_deploy_jobs = {}
+_deploy_jobs_lock = threading.Lock()
 
-    if 'zip_file' not in request.files:
-        return jsonify({"error": "No zip file provided"}), 400
+class _SizedBody:
+    """
+    Streams a file object as a request body of known length. requests takes the
+    length from __len__ and reads the upload in chunks instead of probing the
+    file object (fileno(), getvalue()) for its size.
+    """
+    def __init__(self, fileobj, size: int, chunk_size: int = 1 << 20):
+        self.fileobj = fileobj
+        self.size = size
+        self.chunk_size = chunk_size
 
-    zip_file = request.files['zip_file']
-    if zip_file.filename == '':
-        return jsonify({"error": "No selected file"}), 400
+    def __len__(self):
+        return self.size
 
-    netlify_pat = os.getenv("NETLIFY_PAT")
-    if not netlify_pat:
-        logger.error("Netlify PAT not configured in environment variables.")
-        return jsonify({"error": "Server is not configured for deployments."}), 500
+    def __iter__(self):
+        return iter(lambda: self.fileobj.read(self.chunk_size), b"")
 
+def _do_deploy(temp_dir: str, upload, netlify_pat: str):
+    """
+    Extracts, repacks if needed and uploads a saved zip to a new Netlify site.
+    upload is a seekable file object holding the uploaded archive.
+    Runs on the deploy thread pool and always closes upload and removes temp_dir when done.
+    Returns a tuple of (response_body, status_code)
+    """
     auth_header = {"Authorization": f"Bearer {netlify_pat}"}
-    temp_dir = None
     
     try:
-        # Create temporary directory
-        temp_dir = tempfile.mkdtemp()
-        logger.info(f"Created temporary directory: {temp_dir}")
-        
-        # Save uploaded zip file
-        zip_path = os.path.join(temp_dir, "upload.zip")
-        zip_file.save(zip_path)
-        
-        # Extract zip file
+        # Stream-extract entries straight from the uploaded archive
         extract_dir = os.path.join(temp_dir, "extracted")
         os.makedirs(extract_dir, exist_ok=True)
+        extract_root = os.path.realpath(extract_dir)
         
-        with zipfile.ZipFile(zip_path, 'r') as zip_ref:
-            zip_ref.extractall(extract_dir)
+        with zipfile.ZipFile(upload, 'r') as zip_ref:
+            # Inspect the archive layout up front instead of after extracting
+            names = zip_ref.namelist()
+            top_level = names[0].split('/', 1)[0] + '/' if names else ''
+            if top_level != '/' and all(name.startswith(top_level) for name in names):
+                # Everything is nested in a single directory, strip it while extracting
+                prefix = top_level
+                logger.info(f"Found nested directory: {prefix}, flattening...")
+            else:
+                prefix = ''
+            
+            # A flat archive with index.html at its root can be uploaded unchanged
+            needs_repack = bool(prefix) or 'index.html' not in names
+            if needs_repack:
+                for info in zip_ref.infolist():
+                    relative_name = info.filename[len(prefix):]
+                    if not relative_name:
+                        continue
+                    target_path = os.path.realpath(os.path.join(extract_root, relative_name))
+                    if not target_path.startswith(extract_root + os.sep):
+                        logger.warning(f"Skipping unsafe zip entry: {info.filename}")
+                        continue
+                    if info.is_dir():
+                        os.makedirs(target_path, exist_ok=True)
+                        continue
+                    os.makedirs(os.path.dirname(target_path), exist_ok=True)
+                    with zip_ref.open(info) as src, open(target_path, 'wb') as dst:
+                        shutil.copyfileobj(src, dst, length=1 << 20)
         
-        logger.info(f"Extracted zip file to: {extract_dir}")
+        if needs_repack:
+            logger.info(f"Extracted zip file to: {extract_dir}")
         
-        # Debug: Log the extracted file structure
-        logger.info("=== EXTRACTED FILE STRUCTURE ===")
-        for root, dirs, files in os.walk(extract_dir):
-            level = root.replace(extract_dir, '').count(os.sep)
-            indent = ' ' * 2 * level
-            logger.info(f"{indent}{os.path.basename(root)}/")
-            subindent = ' ' * 2 * (level + 1)
-            for file in files:
-                logger.info(f"{subindent}{file}")
-        logger.info("=== END FILE STRUCTURE ===")
+            # Walk the extracted tree once and reuse it for every step below
+            tree = {root: (dirs, files) for root, dirs, files in os.walk(extract_dir)}
+            
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug("=== EXTRACTED FILE STRUCTURE ===")
+                for root, (dirs, files) in tree.items():
+                    level = root.replace(extract_dir, '').count(os.sep)
+                    indent = ' ' * 2 * level
+                    logger.debug(f"{indent}{os.path.basename(root)}/")
+                    subindent = ' ' * 2 * (level + 1)
+                    for file in files:
+                        logger.debug(f"{subindent}{file}")
+                logger.debug("=== END FILE STRUCTURE ===")
         
-        # Check if files are nested in a subdirectory and flatten if needed
-        extracted_items = os.listdir(extract_dir)
-        if len(extracted_items) == 1 and os.path.isdir(os.path.join(extract_dir, extracted_items[0])):
-            # Files are nested in a single directory, move them up
-            nested_dir = os.path.join(extract_dir, extracted_items[0])
-            logger.info(f"Found nested directory: {extracted_items[0]}, flattening...")
-            for item in os.listdir(nested_dir):
-                src = os.path.join(nested_dir, item)
-                dst = os.path.join(extract_dir, item)
-                shutil.move(src, dst)
-                logger.info(f"Moved {item} to root level")
-            os.rmdir(nested_dir)
-            logger.info("Flattened nested directory structure")
+            # Ensure there's an index.html file at root level
+            index_html_path = os.path.join(extract_dir, 'index.html')
+            root_files = tree[extract_dir][1]
+            if 'index.html' in root_files:
+                logger.info("✅ index.html found at root level")
+            else:
+                logger.warning("❌ No index.html at root level, looking for HTML files...")
+                html_files = [
+                    os.path.join(root, filename)
+                    for root, (dirs, filenames) in tree.items()
+                    for filename in filenames
+                    if filename.lower().endswith(('.html', '.htm'))
+                ]
+            
+                if html_files:
+                    first_html = html_files[0]
+                    shutil.copy2(first_html, index_html_path)
+                    root_files.append('index.html')
+                    logger.info(f"Copied {os.path.basename(first_html)} to index.html at root")
+                else:
+                    logger.error("No HTML files found in the ZIP!")
         
-        # Ensure there's an index.html file at root level
-        index_html_path = os.path.join(extract_dir, 'index.html')
-        if os.path.exists(index_html_path):
-            logger.info("✅ index.html found at root level")
+            # Create a new ZIP file from the extracted and processed files
+            processed_zip_path = os.path.join(temp_dir, "processed.zip")
+            # Level 1: web assets are mostly pre-compressed, higher levels cost CPU for little gain
+            with zipfile.ZipFile(processed_zip_path, 'w', zipfile.ZIP_DEFLATED, compresslevel=1) as zip_ref:
+                root_len = len(extract_dir) + 1
+                for root, (dirs, files) in tree.items():
+                    for file in files:
+                        file_path = os.path.join(root, file)
+                        # Archive name is the path relative to extract_dir
+                        arcname = file_path[root_len:]
+                        if arcname.lower().endswith(PRECOMPRESSED_EXTENSIONS):
+                            compress_type = zipfile.ZIP_STORED
+                        else:
+                            compress_type = zipfile.ZIP_DEFLATED
+                        zip_ref.write(file_path, arcname, compress_type=compress_type, compresslevel=1)
+        
+            logger.info(f"Created processed ZIP file: {processed_zip_path}")
         else:
-            logger.warning("❌ No index.html at root level, looking for HTML files...")
-            html_files = []
-            for root, dirs, filenames in os.walk(extract_dir):
-                for filename in filenames:
-                    if filename.lower().endswith(('.html', '.htm')):
-                        html_files.append(os.path.join(root, filename))
-            
-            if html_files:
-                first_html = html_files[0]
-                shutil.copy2(first_html, index_html_path)
-                logger.info(f"Copied {os.path.basename(first_html)} to index.html at root")
-            else:
-                logger.error("No HTML files found in the ZIP!")
+            logger.info("Archive is flat with index.html at root, uploading it unchanged")
         
         # Create a new site
         logger.info("Creating new site...")
         create_url = "https://api.netlify.com/api/v1/sites"
         create_headers = {**auth_header, "Content-Type": "application/json"}
         
-        create_response = requests.post(create_url, headers=create_headers, json={})
+        create_response = _netlify_session.post(create_url, headers=create_headers, json={}, timeout=NETLIFY_TIMEOUT)
         create_response.raise_for_status()
         
         new_site_data = create_response.json()
         site_id = new_site_data.get("id")
         logger.info(f"Created new site with ID: {site_id}")
         
-        # Create a new ZIP file from the extracted and processed files
-        processed_zip_path = os.path.join(temp_dir, "processed.zip")
-        with zipfile.ZipFile(processed_zip_path, 'w', zipfile.ZIP_DEFLATED) as zip_ref:
-            for root, dirs, files in os.walk(extract_dir):
-                for file in files:
-                    file_path = os.path.join(root, file)
-                    # Use relative path from extract_dir as the archive name
-                    arcname = os.path.relpath(file_path, extract_dir)
-                    zip_ref.write(file_path, arcname)
-                    logger.info(f"Added to ZIP: {arcname}")
-        
-        logger.info(f"Created processed ZIP file: {processed_zip_path}")
-        
         # Deploy using direct ZIP upload method
         deploy_url = f"https://api.netlify.com/api/v1/sites/{site_id}/deploys"
-        deploy_headers = {**auth_header, "Content-Type": "application/zip"}
-        
-        with open(processed_zip_path, 'rb') as zip_file:
-            zip_content = zip_file.read()
+        if needs_repack:
+            upload_file = open(processed_zip_path, 'rb')
+        else:
+            upload_file = upload
+        upload_size = upload_file.seek(0, os.SEEK_END)
+        upload_file.seek(0)
+        deploy_headers = {
+            **auth_header,
+            "Content-Type": "application/zip",
+        }
         
-        deploy_response = requests.post(deploy_url, headers=deploy_headers, data=zip_content)
+        # Stream the body in chunks instead of buffering it; Content-Length comes from the wrapper
+        with upload_file:
+            deploy_response = _netlify_session.post(
+                deploy_url, headers=deploy_headers, data=_SizedBody(upload_file, upload_size),
+                timeout=NETLIFY_TIMEOUT,
+            )
         deploy_response.raise_for_status()
         
         deploy_info = deploy_response.json()
@@ -274,58 +398,196 @@ def deploy_to_netlify():
         
         logger.info(f"Deployment successful! URL: {site_url}")
         
-        return jsonify({
+        return {
             "success": True,
             "message": "Deployment successful. Site is processing and will be live shortly.",
             "url": site_url,
             "site_id": site_id,
             "deploy_id": deploy_id
-        }), 200
+        }, 200
 
     except zipfile.BadZipFile:
         logger.error("Invalid zip file provided")
-        return jsonify({"error": "Invalid zip file provided"}), 400
+        return {"error": "Invalid zip file provided"}, 400
     except requests.exceptions.RequestException as e:
         logger.error(f"Netlify API error: {e}")
         if e.response is not None:
             error_details = e.response.text
             status_code = e.response.status_code
             logger.error(f"Netlify API Response (Status {status_code}): {error_details}")
-            return jsonify({
+            return {
                 "error": "Failed to deploy to Netlify.",
                 "details": error_details
-            }), status_code
-        return jsonify({"error": f"Deployment failed: {str(e)}"}), 500
+            }, status_code
+        return {"error": f"Deployment failed: {str(e)}"}, 500
     except Exception as e:
         logger.error(f"Failed to deploy to Netlify: {e}")
-        return jsonify({"error": f"Deployment failed: {str(e)}"}), 500
+        return {"error": f"Deployment failed: {str(e)}"}, 500
     finally:
+        upload.close()
+        
         # Clean up temporary directory
-        if temp_dir and os.path.exists(temp_dir):
+        if os.path.exists(temp_dir):
             try:
                 shutil.rmtree(temp_dir)
                 logger.info(f"Cleaned up temporary directory: {temp_dir}")
             except Exception as cleanup_error:
                 logger.warning(f"Failed to clean up temporary directory: {cleanup_error}")
 
+def _deploy_job_state(job_id: str, future) -> tuple:
+    """Returns (response_body, status_code) for a deploy job's future."""
+    if not future.done():
+        return {"job_id": job_id, "status": "processing"}, 202
+    
+    try:
+        response_body, status_code = future.result()
+    except Exception as e:
+        logger.error(f"Deployment job {job_id} crashed: {e}")
+        response_body, status_code = {"error": f"Deployment failed: {str(e)}"}, 500
+    
+    status = "succeeded" if status_code == 200 else "failed"
+    return {"job_id": job_id, "status": status, **response_body}, status_code
+
+def _publish_deploy_job(job_id: str, response_body: dict, status_code: int):
+    """
+    Mirrors a job's state to Redis so any gunicorn worker can answer
+    GET /deploy/<job_id>, not just the one running the deploy.
+    """
+    state = orjson.dumps({"body": response_body, "status_code": status_code})
+    redis_call("deploy job write", lambda client: client.setex(f"deploy:{job_id}", DEPLOY_JOB_TTL, state))
+
+def _prune_deploy_jobs():
+    """Drops finished deploy jobs older than DEPLOY_JOB_TTL. Caller holds _deploy_jobs_lock."""
+    cutoff = time.time() - DEPLOY_JOB_TTL
+    expired = [
+        job_id for job_id, (future, submitted_at) in _deploy_jobs.items()
+        if future.done() and submitted_at < cutoff
+    ]
+    for job_id in expired:
+        del _deploy_jobs[job_id]
+
+@app.route('/deploy', methods=['POST'])
+def deploy_to_netlify():
+    """
+    Deploys a zipped website to Netlify by extracting the zip and using file digest method.
+    Creates a new site for each deployment.
+    Requires API key validation for security.
+    The upload is saved and handed to a background worker; the response is
+    202 with a job_id that can be polled at GET /deploy/<job_id>.
+    """
+    logger.info("--- Netlify Deployment Request ---")
+
+    # Validate API key; mandatory once a shared secret is configured
+    api_key = request.form.get('api_key') or request.headers.get('X-API-Key')
+    if api_key or EXPECTED_API_KEY:
+        is_valid, error_message = is_api_key_valid(api_key)
+        if not is_valid:
+            return jsonify({"error": f"API key validation failed: {error_message}"}), 401
+
+    if 'zip_file' not in request.files:
+        return jsonify({"error": "No zip file provided"}), 400
+
+    zip_file = request.files['zip_file']
+    if zip_file.filename == '':
+        return jsonify({"error": "No selected file"}), 400
+
+    netlify_pat = os.getenv("NETLIFY_PAT")
+    if not netlify_pat:
+        logger.error("Netlify PAT not configured in environment variables.")
+        return jsonify({"error": "Server is not configured for deployments."}), 500
+
+    # Create temporary directory; the deploy worker owns it from here on
+    temp_dir = tempfile.mkdtemp()
+    logger.info(f"Created temporary directory: {temp_dir}")
+    
+    # Small uploads stay in memory; larger ones (or unknown sizes) go to disk. Not a
+    # SpooledTemporaryFile: before Python 3.11 it lacks seekable(), which ZipFile.open() needs
+    if request.content_length is not None and request.content_length <= UPLOAD_SPOOL_MAX_SIZE:
+        upload = io.BytesIO()
+    else:
+        upload = open(os.path.join(temp_dir, "upload.zip"), "w+b")
+    
+    try:
+        zip_file.save(upload)
+        upload.seek(0)
+        
+        # Only reads the central directory, so bad uploads are rejected synchronously
+        if not zipfile.is_zipfile(upload):
+            upload.close()
+            shutil.rmtree(temp_dir, ignore_errors=True)
+            logger.error("Invalid zip file provided")
+            return jsonify({"error": "Invalid zip file provided"}), 400
+        upload.seek(0)
+        
+        job_id = str(uuid.uuid4())
+        _publish_deploy_job(job_id, {"job_id": job_id, "status": "processing"}, 202)
+        future = _deploy_pool.submit(_do_deploy, temp_dir, upload, netlify_pat)
+        future.add_done_callback(lambda done: _publish_deploy_job(job_id, *_deploy_job_state(job_id, done)))
+    except Exception as e:
+        upload.close()
+        shutil.rmtree(temp_dir, ignore_errors=True)
+        logger.error(f"Failed to queue deployment: {e}")
+        return jsonify({"error": f"Deployment failed: {str(e)}"}), 500
+    
+    with _deploy_jobs_lock:
+        _prune_deploy_jobs()
+        _deploy_jobs[job_id] = (future, time.time())
+    
+    logger.info(f"Queued deployment job: {job_id}")
+    return jsonify({
+        "success": True,
+        "job_id": job_id,
+        "status": "processing",
+        "status_url": f"/deploy/{job_id}"
+    }), 202
+
+@app.route('/deploy/<job_id>', methods=['GET'])
+@limiter.exempt
+def deploy_status(job_id):
+    """
+    Returns the state of a queued deployment.
+    202 while processing; once finished, the original deploy response and status code.
+    Jobs started by another worker process are read from Redis.
+    """
+    with _deploy_jobs_lock:
+        job = _deploy_jobs.get(job_id)
+    
+    if job is not None:
+        response_body, status_code = _deploy_job_state(job_id, job[0])
+        return jsonify(response_body), status_code
+    
+    state = redis_call("deploy job read", lambda client: client.get(f"deploy:{job_id}"))
+    if state is None:
+        return jsonify({"error": "Unknown deployment job"}), 404
+    
+    state = orjson.loads(state)
+    return jsonify(state["body"]), state["status_code"]
+
 
 # --- Health Check Endpoint ---
 @app.route('/api/health', methods=['GET'])
+@limiter.exempt
 def health_check():
     """
     Simple health check endpoint
     """
-    print(f"--- Health Check Request ---")
     response_data = {
         "status": "healthy",
         "service": "translation-service",
         "timestamp": "2025-01-19T16:05:51Z"
     }
-    print(f"--- Health Check Response ---")
-    print(f"Response data: {response_data}")
+    logger.debug("Health check response: %s", response_data)
     return jsonify(response_data), 200
 
+# --- Model Preload ---
+# Load the model at import rather than on the first request. Under gunicorn
+# --preload this runs once in the master and forked workers share the weights.
+if os.getenv("PRELOAD_MODEL", "false").lower() == "true":
+    initialize_model()
+
 # --- Server Start ---
+# For production use gunicorn: gunicorn -c gunicorn_conf.py server:app
 if __name__ == '__main__':
     port = int(os.environ.get('PORT', 3001))
-    app.run(host='0.0.0.0', port=port, debug=True)
\ No newline at end of file
+    debug = os.environ.get('FLASK_DEBUG', 'false').lower() == 'true'
+    app.run(host='0.0.0.0', port=port, debug=debug, threaded=True)
\ No newline at end of file
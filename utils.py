@@ -1,62 +1,209 @@
 import os
+
+# CRITICAL: Set environment variables BEFORE importing torch/transformers
+os.environ["PYTORCH_ENABLE_MPS_FALLBACK"] = "1"
+os.environ["TOKENIZERS_PARALLELISM"] = "false"
+# OpenMP reads these when torch loads it. Pin threads to cores only when this
+# process already has its own CPU subset (numactl/taskset); unpinned processes
+# sharing a host would otherwise all bind to the same first cores
+if hasattr(os, "sched_getaffinity") and len(os.sched_getaffinity(0)) < (os.cpu_count() or 0):
+    os.environ.setdefault("OMP_PROC_BIND", "close")
+    os.environ.setdefault("OMP_PLACES", "cores")
+
 import logging
+import hashlib
 import torch
+import redis
 from transformers import AutoModelForCausalLM, AutoTokenizer
 from dotenv import load_dotenv
 import gc
 import time
+import shutil
+import tempfile
+try:
+    import fcntl
+except ImportError:  # Windows: saves aren't coordinated across processes
+    fcntl = None
+import queue
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future, TimeoutError as FutureTimeoutError
 
 # Load environment variables
 load_dotenv()
 
 # Setup logging
-logging.basicConfig(level=logging.INFO)
+logging.basicConfig(level=os.getenv("LOG_LEVEL", "INFO").upper())
 logger = logging.getLogger(__name__)
 
-# CRITICAL: Set environment variables BEFORE importing transformers
-os.environ["PYTORCH_ENABLE_MPS_FALLBACK"] = "1"
-os.environ["TOKENIZERS_PARALLELISM"] = "false"
-
-# Language code mapping for Sarvam-Translate
-LANGUAGE_MAP = {
-    "as": "Assamese", "as-IN": "Assamese",
-    "bn": "Bengali", "bn-IN": "Bengali",
-    "brx": "Bodo", "brx-IN": "Bodo",
-    "doi": "Dogri", "doi-IN": "Dogri",
-    "gu": "Gujarati", "gu-IN": "Gujarati",
-    "en": "English", "en-IN": "English",
-    "hi": "Hindi", "hi-IN": "Hindi",
-    "kn": "Kannada", "kn-IN": "Kannada",
-    "ks": "Kashmiri", "ks-IN": "Kashmiri",
-    "kok": "Konkani", "kok-IN": "Konkani",
-    "mai": "Maithili", "mai-IN": "Maithili",
-    "ml": "Malayalam", "ml-IN": "Malayalam",
-    "mni": "Manipuri", "mni-IN": "Manipuri",
-    "mr": "Marathi", "mr-IN": "Marathi",
-    "ne": "Nepali", "ne-IN": "Nepali",
-    "or": "Odia", "or-IN": "Odia",
-    "pa": "Punjabi", "pa-IN": "Punjabi",
-    "sa": "Sanskrit", "sa-IN": "Sanskrit",
-    "sat": "Santali", "sat-IN": "Santali",
-    "sd": "Sindhi", "sd-IN": "Sindhi",
-    "ta": "Tamil", "ta-IN": "Tamil",
-    "te": "Telugu", "te-IN": "Telugu",
-    "ur": "Urdu", "ur-IN": "Urdu"
+# Language codes supported by Sarvam-Translate
+_BASE = {
+    "as": "Assamese",
+    "bn": "Bengali",
+    "brx": "Bodo",
+    "doi": "Dogri",
+    "gu": "Gujarati",
+    "en": "English",
+    "hi": "Hindi",
+    "kn": "Kannada",
+    "ks": "Kashmiri",
+    "kok": "Konkani",
+    "mai": "Maithili",
+    "ml": "Malayalam",
+    "mni": "Manipuri",
+    "mr": "Marathi",
+    "ne": "Nepali",
+    "or": "Odia",
+    "pa": "Punjabi",
+    "sa": "Sanskrit",
+    "sat": "Santali",
+    "sd": "Sindhi",
+    "ta": "Tamil",
+    "te": "Telugu",
+    "ur": "Urdu",
 }
 
+# Each code is accepted both bare ("hi") and region-qualified ("hi-IN")
+LANGUAGE_MAP = {code: name for base, name in _BASE.items() for code in (base, f"{base}-IN")}
+
 # Reverse mapping for language detection
-REVERSE_LANGUAGE_MAP = {v.lower(): k for k, v in LANGUAGE_MAP.items() if "-IN" not in k}
+REVERSE_LANGUAGE_MAP = {name.lower(): base for base, name in _BASE.items()}
+
+# Precomputed "xx" -> "xx-IN" normalization for every known code
+_LANG_NORM = {code: code if "-" in code else f"{code}-IN" for code in LANGUAGE_MAP}
+
+# Unicode blocks written by a single supported language, for detection without the model.
+# Bengali script is shared by Bengali, Assamese and Manipuri; the Assamese-only letters
+# ra/wa decide Assamese, otherwise Bengali. Devanagari and Perso-Arabic are left to the model.
+_SCRIPT_BLOCKS = (
+    (0x0980, 0x09FF, "bn"),   # Bengali
+    (0x0A00, 0x0A7F, "pa"),   # Gurmukhi
+    (0x0A80, 0x0AFF, "gu"),   # Gujarati
+    (0x0B00, 0x0B7F, "or"),   # Odia
+    (0x0B80, 0x0BFF, "ta"),   # Tamil
+    (0x0C00, 0x0C7F, "te"),   # Telugu
+    (0x0C80, 0x0CFF, "kn"),   # Kannada
+    (0x0D00, 0x0D7F, "ml"),   # Malayalam
+    (0x1C50, 0x1C7F, "sat"),  # Ol Chiki
+    (0xABC0, 0xABFF, "mni"),  # Meetei Mayek
+)
+_SCRIPT_OF = {chr(cp): code for start, end, code in _SCRIPT_BLOCKS for cp in range(start, end + 1)}
+_ASSAMESE_LETTERS = frozenset("\u09f0\u09f1")
+
+# Optional fastText language-ID model (lid.176.bin) tried before the LLM
+FASTTEXT_LID_PATH = os.getenv("FASTTEXT_LID_PATH")
+FASTTEXT_MIN_CONFIDENCE = float(os.getenv("FASTTEXT_MIN_CONFIDENCE", 0.8))
+# fastText labels that differ from our codes
+_FASTTEXT_LABELS = {"gom": "kok"}
+_lid_model = None
+_lid_lock = threading.Lock()
+
+# Response cache configuration
+CACHE_TTL = int(os.getenv("CACHE_TTL", 86400))
+redis_client = redis.Redis(
+    host=os.getenv("REDIS_HOST", "localhost"),
+    port=int(os.getenv("REDIS_PORT", 6379)),
+    decode_responses=True,
+    socket_timeout=0.1,
+    socket_connect_timeout=0.1,
+)
+# After a connection failure Redis is skipped for this many seconds, see redis_call
+REDIS_RETRY_SECONDS = float(os.getenv("REDIS_RETRY_SECONDS", 30))
+_redis_down_until = 0.0
+
+# Micro-batching configuration
+MAX_BATCH = int(os.getenv("MAX_BATCH", 32))
+MAX_WAIT_MS = int(os.getenv("MAX_WAIT_MS", 10))
+TRANSLATE_TIMEOUT = int(os.getenv("TRANSLATE_TIMEOUT", 600))
+
+class _LRUCache:
+    """Thread-safe in-process LRU mapping bytes keys to results."""
+    def __init__(self, maxsize: int):
+        self.maxsize = maxsize
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            value = self._data.get(key)
+            if value is not None:
+                self._data.move_to_end(key)
+            return value
+
+    def put(self, key, value):
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            if len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+# In-process LRUs in front of Redis and the model, keyed by 16-byte digests
+DETECT_CACHE_SIZE = int(os.getenv("DETECT_CACHE_SIZE", 4096))
+TRANSLATE_CACHE_SIZE = int(os.getenv("TRANSLATE_CACHE_SIZE", 4096))
+_detect_cache = _LRUCache(DETECT_CACHE_SIZE)
+_translate_cache = _LRUCache(TRANSLATE_CACHE_SIZE)
 
 # Model configuration
 MODEL_NAME = "sarvamai/sarvam-translate"
+DETECT_SYSTEM_PROMPT = "Identify the language of the following text. Respond with only the language name."
+# Weight quantization: "int8" (dynamic INT8 nn.Linear on CPU), "int4" (NF4 on GPU) or "none"
+QUANT = os.getenv("QUANT", "int8").lower()
+# Inference backend: "transformers" (default), "ctranslate2", "vllm", "llamacpp" or "onnx"
+BACKEND = os.getenv("BACKEND", "transformers").lower()
+CT2_MODEL_DIR = os.getenv("CT2_MODEL_DIR", "./ct2")
+GGUF_MODEL_PATH = os.getenv("GGUF_MODEL_PATH", "./gguf/sarvam-translate-Q4_K_M.gguf")
+ONNX_MODEL_DIR = os.getenv("ONNX_MODEL_DIR", "./onnx")
+# Run the ONNX backend on the Qualcomm Hexagon NPU through the QNN execution provider
+USE_QNN = os.getenv("USE_QNN", "false").lower() == "true"
+QNN_BACKEND_PATH = os.getenv("QNN_BACKEND_PATH", "libQnnHtp.so")
+# Local safetensors copy written after the first load; set empty to disable
+MODEL_CACHE_DIR = os.getenv("MODEL_CACHE_DIR", "./cache/sarvam")
+# Wrap the model forward in torch.compile after loading
+TORCH_COMPILE = os.getenv("TORCH_COMPILE", "false").lower() == "true"
+# Decode into a pre-allocated fixed-size KV cache (transformers StaticCache) instead of growing it per token
+STATIC_KV_CACHE = os.getenv("STATIC_KV_CACHE", "false").lower() == "true"
+# With STATIC_KV_CACHE on CUDA, GPU memory for this many sequences of
+# KV_CACHE_MAX_LEN tokens (prompt + output) is reserved at startup
+KV_CACHE_BATCH = int(os.getenv("KV_CACHE_BATCH", 4))
+KV_CACHE_MAX_LEN = int(os.getenv("KV_CACHE_MAX_LEN", 1024))
+# With STATIC_KV_CACHE on CUDA, share of GPU memory this process may claim
+# through the caching allocator; other loads leave the allocator uncapped
+CUDA_MEMORY_FRACTION = float(os.getenv("CUDA_MEMORY_FRACTION", 0.9))
 model = None
 tokenizer = None
 
+# Tokenized chat-template prefix/suffix per system prompt, see _prompt_parts
+_PROMPT_PARTS_CACHE = {}
+_USER_TEXT_MARKER = "\ue000"
+# EOS plus end-of-turn token ids, see _stop_token_ids
+_STOP_TOKEN_IDS = None
+
+# Serializes model loading; _model_ready flips only after a complete load
+_INIT_LOCK = threading.Lock()
+_model_ready = False
+
 def initialize_model():
     """
     Initialize the Sarvam-Translate model and tokenizer.
     This is called lazily on first use to avoid loading the model at import time.
+    Safe to call from several threads: only the first caller loads, the rest wait.
     """
+    global _model_ready
+    
+    if _model_ready:
+        return
+    with _INIT_LOCK:
+        if not _model_ready:
+            _load_model()
+            _model_ready = True
+
+def get_model() -> tuple:
+    """Returns (model, tokenizer), loading them on first use."""
+    initialize_model()
+    return model, tokenizer
+
+def _load_model():
+    """Loads the model and tokenizer into the module globals. Called under _INIT_LOCK."""
     global model, tokenizer
     
     if model is None or tokenizer is None:
@@ -75,15 +222,29 @@ def initialize_model():
             
             if device == "cpu":
                 print("⚠️  Running on CPU - translations will be slow", flush=True)
+                _configure_cpu_threads()
+            elif BACKEND == "transformers" and STATIC_KV_CACHE:
+                torch.cuda.set_per_process_memory_fraction(CUDA_MEMORY_FRACTION)
+            
+            # Prefer the local safetensors copy saved by a previous run
+            model_source = _model_source()
+            print(f"Model source: {model_source}", flush=True)
             
             # Step 1: Load tokenizer
             print("\n[1/3] Loading tokenizer...", flush=True)
             try:
                 tokenizer = AutoTokenizer.from_pretrained(
-                    MODEL_NAME,
+                    model_source,
+                    use_fast=True,
                     trust_remote_code=True,
                     local_files_only=False
                 )
+                if not tokenizer.is_fast:
+                    print("⚠️  Fast tokenizer unavailable, using the slow Python tokenizer", flush=True)
+                # Left padding so batched prompts end where generation starts
+                tokenizer.padding_side = "left"
+                if tokenizer.pad_token is None:
+                    tokenizer.pad_token = tokenizer.eos_token
                 print("✓ Tokenizer loaded", flush=True)
             except Exception as e:
                 print(f"❌ Tokenizer loading failed: {e}", flush=True)
@@ -102,51 +263,108 @@ def initialize_model():
             start_time = time.time()
             
             try:
-                if device == "cpu":
+                if BACKEND == "ctranslate2":
+                    model = _load_ctranslate2(device)
+                
+                elif BACKEND == "vllm":
+                    model = _load_vllm()
+                
+                elif BACKEND == "llamacpp":
+                    model = _load_llamacpp()
+                
+                elif BACKEND == "onnx":
+                    model = _load_onnx()
+                
+                elif device == "cpu":
+                    # BF16 halves weight bytes per decoded token; dynamic INT8
+                    # quantization needs FP32 weights to start from
+                    if QUANT == "int4":
+                        print("⚠️  QUANT=int4 on CPU needs BACKEND=llamacpp - falling back to INT8", flush=True)
+                    cpu_quant_int8 = QUANT in ("int8", "int4")
+                    cpu_dtype = torch.float32 if cpu_quant_int8 else torch.bfloat16
+                    print(f"   CPU dtype: {cpu_dtype}", flush=True)
+                    
                     # Use the most conservative loading approach for CPU
                     # Note: Some transformers versions use 'dtype' instead of 'torch_dtype'
                     try:
                         model = AutoModelForCausalLM.from_pretrained(
-                            MODEL_NAME,
-                            dtype=torch.float32,  # Newer transformers versions
+                            model_source,
+                            dtype=cpu_dtype,  # Newer transformers versions
+                            use_safetensors=model_source != MODEL_NAME or None,
                             low_cpu_mem_usage=True,
                             trust_remote_code=True,
-                            device_map=None,
+                            device_map={"": "cpu"},  # Materialize weights on CPU directly, no second copy
                             local_files_only=False,
                         )
                     except TypeError:
                         # Fallback for older transformers versions
                         model = AutoModelForCausalLM.from_pretrained(
-                            MODEL_NAME,
-                            torch_dtype=torch.float32,
+                            model_source,
+                            torch_dtype=cpu_dtype,
+                            use_safetensors=model_source != MODEL_NAME or None,
                             low_cpu_mem_usage=True,
                             trust_remote_code=True,
-                            device_map=None,
+                            device_map={"": "cpu"},
                             local_files_only=False,
                         )
                     
                     print("\n✓ Model checkpoint loaded!", flush=True)
-                    print("   Moving to CPU device...", flush=True)
                     
-                    # Explicitly move to CPU
-                    model = model.to('cpu')
+                    # Save before quantizing; quantized modules can't be reloaded with from_pretrained
+                    if model_source == MODEL_NAME:
+                        _save_local_copy()
+                    
+                    # CPU decode is memory-bandwidth bound, INT8 weights cut the bytes read per token
+                    if cpu_quant_int8:
+                        print("   Quantizing Linear layers to INT8...", flush=True)
+                        model = torch.ao.quantization.quantize_dynamic(
+                            model, {torch.nn.Linear}, dtype=torch.qint8, inplace=True
+                        )
                     
                     # Set to eval mode
                     model.eval()
                     
                     # Disable gradients
-                    for param in model.parameters():
-                        param.requires_grad = False
+                    model.requires_grad_(False)
                     
                 else:
                     # GPU loading
+                    quantization_config = None
+                    if QUANT == "int4":
+                        # 4-bit NF4 weights, a quarter of the bytes read per decoded token vs BF16
+                        from transformers import BitsAndBytesConfig
+                        print("   Loading weights as 4-bit NF4...", flush=True)
+                        quantization_config = BitsAndBytesConfig(
+                            load_in_4bit=True,
+                            bnb_4bit_quant_type="nf4",
+                            bnb_4bit_compute_dtype=torch.bfloat16,
+                        )
+                    
                     model = AutoModelForCausalLM.from_pretrained(
-                        MODEL_NAME,
+                        model_source,
                         torch_dtype=torch.bfloat16,
+                        quantization_config=quantization_config,
+                        use_safetensors=model_source != MODEL_NAME or None,
                         low_cpu_mem_usage=True,
                         trust_remote_code=True,
                         device_map="auto",
                     )
+                    
+                    # 4-bit weights can't be serialized; the copy is only useful unquantized
+                    if model_source == MODEL_NAME and quantization_config is None:
+                        _save_local_copy()
+                
+                if TORCH_COMPILE and BACKEND == "transformers":
+                    # Fuses kernels and removes per-token Python dispatch; CUDA graphs only help on GPU
+                    print("   Compiling model forward with torch.compile...", flush=True)
+                    model.forward = torch.compile(
+                        model.forward,
+                        mode="reduce-overhead" if device == "cuda" else "default",
+                        dynamic=True,
+                    )
+                
+                if STATIC_KV_CACHE and BACKEND == "transformers":
+                    _enable_static_kv_cache()
                 
                 elapsed = time.time() - start_time
                 print(f"\n✓ Model fully loaded in {elapsed:.1f} seconds", flush=True)
@@ -167,6 +385,13 @@ def initialize_model():
             except:
                 pass
             
+            if STATIC_KV_CACHE and device == "cuda" and BACKEND == "transformers":
+                _reserve_kv_memory()
+            
+            # Pay one-off compile/allocator costs now rather than on the first request
+            print("Warming up...", flush=True)
+            _warmup_model()
+            
             print("=" * 60, flush=True)
             print("✓ Initialization complete - ready to translate!", flush=True)
             print("=" * 60, flush=True)
@@ -195,25 +420,325 @@ def initialize_model():
             
             raise Exception(f"Model initialization failed: {str(e)}")
 
+def _configure_cpu_threads():
+    """
+    Sets intra-op threads from OMP_NUM_THREADS (default: half the logical CPUs,
+    roughly the physical cores) and a single inter-op thread. Decode is
+    memory-bound, so oversubscribing cores only adds contention.
+    """
+    num_threads = int(os.environ.get("OMP_NUM_THREADS", max(1, (os.cpu_count() or 2) // 2)))
+    torch.set_num_threads(num_threads)
+    try:
+        torch.set_num_interop_threads(1)
+    except RuntimeError:
+        # Can only be set before the first inter-op parallel work
+        pass
+    print(f"CPU threads: {torch.get_num_threads()} intra-op, {torch.get_num_interop_threads()} inter-op", flush=True)
+
+def _model_source() -> str:
+    """Returns MODEL_CACHE_DIR if it holds a saved copy of the model, else MODEL_NAME."""
+    if MODEL_CACHE_DIR and os.path.isfile(os.path.join(MODEL_CACHE_DIR, "config.json")):
+        return MODEL_CACHE_DIR
+    return MODEL_NAME
+
+def _save_local_copy():
+    """
+    Saves the loaded model and tokenizer to MODEL_CACHE_DIR as safetensors so
+    later starts mmap them instead of resolving and parsing hub shards.
+    Only one process saves at a time (flock on a sibling .lock file); others skip.
+    Failures are reported, not raised.
+    """
+    if not MODEL_CACHE_DIR:
+        return
+    target_dir = os.path.abspath(MODEL_CACHE_DIR)
+    parent_dir = os.path.dirname(target_dir)
+    temp_prefix = f".{os.path.basename(target_dir)}.tmp-"
+    temp_dir = None
+    lock_file = None
+    try:
+        os.makedirs(parent_dir, exist_ok=True)
+        if fcntl is not None:
+            lock_file = open(f"{target_dir}.lock", "w")
+            try:
+                fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                print("   Another process is saving the local model copy, skipping", flush=True)
+                return
+        
+        # Another process may have finished a save since _model_source looked
+        if _model_source() == MODEL_CACHE_DIR:
+            return
+        
+        # Under the lock nobody else is writing, so any temp dirs are leftovers of a killed save
+        for name in os.listdir(parent_dir):
+            if name.startswith(temp_prefix):
+                shutil.rmtree(os.path.join(parent_dir, name), ignore_errors=True)
+        
+        # Write to a sibling directory and move it into place only once complete,
+        # so _model_source never sees a config.json without its weights
+        print(f"   Saving safetensors copy to {MODEL_CACHE_DIR}...", flush=True)
+        temp_dir = tempfile.mkdtemp(prefix=temp_prefix, dir=parent_dir)
+        model.save_pretrained(temp_dir, safe_serialization=True)
+        tokenizer.save_pretrained(temp_dir)
+        # Only an incomplete directory (no config.json) can be in the way here
+        if os.path.isdir(target_dir):
+            shutil.rmtree(target_dir)
+        os.replace(temp_dir, target_dir)
+        temp_dir = None
+    except BaseException as e:
+        if temp_dir is not None:
+            shutil.rmtree(temp_dir, ignore_errors=True)
+        if not isinstance(e, Exception):
+            raise
+        print(f"⚠️  Could not save local model copy: {e}", flush=True)
+    finally:
+        if lock_file is not None:
+            lock_file.close()
+
+def _enable_static_kv_cache():
+    """
+    Switches generate() to a StaticCache: KV tensors are allocated once at their
+    full length and reused by later calls of the same batch size instead of
+    growing with every token. Needs a transformers release that has StaticCache.
+    """
+    try:
+        from transformers import StaticCache  # noqa: F401
+    except ImportError:
+        print("⚠️  STATIC_KV_CACHE needs a newer transformers (StaticCache) - using the dynamic cache", flush=True)
+        return
+    print("   Using a static KV cache...", flush=True)
+    model.generation_config.cache_implementation = "static"
+
+def _reserve_kv_memory():
+    """
+    Grows the CUDA caching allocator to the KV cache size of a typical batch
+    (KV_CACHE_BATCH x KV_CACHE_MAX_LEN) and releases it back to the pool, so the
+    first static-cache requests reuse cached blocks instead of waiting on cudaMalloc.
+    The block stays with the allocator, so size it for expected load, not the ceiling.
+    Failures are reported, not raised.
+    """
+    try:
+        config = getattr(model.config, "text_config", model.config)
+        num_heads = config.num_attention_heads
+        kv_heads = getattr(config, "num_key_value_heads", None) or num_heads
+        head_dim = getattr(config, "head_dim", None) or config.hidden_size // num_heads
+        # Keys and values for every layer
+        kv_bytes = (
+            2 * config.num_hidden_layers * min(KV_CACHE_BATCH, MAX_BATCH) * KV_CACHE_MAX_LEN
+            * kv_heads * head_dim * torch.finfo(model.dtype).bits // 8
+        )
+        print(f"   Reserving {kv_bytes / 1024**3:.2f}GB of GPU memory for the KV cache...", flush=True)
+        block = torch.empty(kv_bytes, dtype=torch.uint8, device="cuda")
+        del block
+    except Exception as e:
+        print(f"⚠️  Could not reserve KV cache memory: {e}", flush=True)
+
+def _load_ctranslate2(device: str):
+    """Loads a CTranslate2 generator from CT2_MODEL_DIR (INT8 weights)."""
+    import ctranslate2
+    
+    if not os.path.isdir(CT2_MODEL_DIR):
+        raise Exception(
+            f"CTranslate2 model not found at {CT2_MODEL_DIR}. Convert it once with: "
+            f"ct2-transformers-converter --model {MODEL_NAME} --quantization int8 --output_dir {CT2_MODEL_DIR}"
+        )
+    
+    print(f"   Loading CTranslate2 generator from {CT2_MODEL_DIR}...", flush=True)
+    compute_type = "int8_float16" if device == "cuda" else "int8"
+    return ctranslate2.Generator(CT2_MODEL_DIR, device=device, compute_type=compute_type)
+
+def _load_vllm():
+    """Loads the model into a vLLM engine (paged KV cache, continuous batching)."""
+    from vllm import LLM
+    
+    print("   Loading vLLM engine...", flush=True)
+    return LLM(model=MODEL_NAME, dtype="bfloat16", trust_remote_code=True)
+
+def _load_llamacpp():
+    """Loads a 4-bit GGUF model (e.g. Q4_K_M) with llama.cpp for CPU decode."""
+    from llama_cpp import Llama
+    
+    if not os.path.isfile(GGUF_MODEL_PATH):
+        raise Exception(
+            f"GGUF model not found at {GGUF_MODEL_PATH}. Convert {MODEL_NAME} once with llama.cpp's "
+            f"convert-hf-to-gguf.py, then: quantize <model-f16.gguf> {GGUF_MODEL_PATH} Q4_K_M"
+        )
+    
+    print(f"   Loading llama.cpp model from {GGUF_MODEL_PATH}...", flush=True)
+    return Llama(model_path=GGUF_MODEL_PATH, n_ctx=4096, n_threads=torch.get_num_threads(), verbose=False)
+
+def _load_onnx():
+    """
+    Loads an ONNX export (with KV cache) from ONNX_MODEL_DIR through optimum's
+    ORTModelForCausalLM, which drives the step-by-step decode with past
+    key/values bound. With USE_QNN the graph runs on the Hexagon NPU and
+    unsupported ops fall back to the CPU provider.
+    """
+    from optimum.onnxruntime import ORTModelForCausalLM
+    
+    if not os.path.isdir(ONNX_MODEL_DIR):
+        raise Exception(
+            f"ONNX model not found at {ONNX_MODEL_DIR}. Export it once with: "
+            f"optimum-cli export onnx --model {MODEL_NAME} --task text-generation-with-past {ONNX_MODEL_DIR}"
+        )
+    
+    if USE_QNN:
+        print(f"   Loading ONNX model on QNN ({QNN_BACKEND_PATH})...", flush=True)
+        return ORTModelForCausalLM.from_pretrained(
+            ONNX_MODEL_DIR,
+            provider="QNNExecutionProvider",
+            provider_options={"backend_path": QNN_BACKEND_PATH},
+            use_cache=True,
+        )
+    
+    print("   Loading ONNX model on CPU...", flush=True)
+    return ORTModelForCausalLM.from_pretrained(ONNX_MODEL_DIR, provider="CPUExecutionProvider", use_cache=True)
+
+def _warmup_model():
+    """Runs a tiny generation through the full prompt path. Failures are reported, not raised."""
+    try:
+        # Runs inside the load, before get_model() would return
+        sequences = _encode_prompts(tokenizer, [_translation_system_prompt("hi-IN")], ["Hello"])
+        _generate(model, tokenizer, sequences, max_new_tokens=4)
+    except Exception as e:
+        print(f"⚠️  Warm-up generation failed: {e}", flush=True)
+
+def normalize_language_code(language_code: str) -> str:
+    """Return the region-qualified form of a language code (e.g. "hi" -> "hi-IN")."""
+    normalized = _LANG_NORM.get(language_code)
+    if normalized is not None:
+        return normalized
+    return language_code if "-" in language_code else f"{language_code}-IN"
+
 def get_language_name(language_code: str) -> str:
     """Convert language code to full language name."""
-    if language_code in LANGUAGE_MAP:
-        return LANGUAGE_MAP[language_code]
+    name = LANGUAGE_MAP.get(language_code) or LANGUAGE_MAP.get(language_code.partition("-")[0])
+    if name is not None:
+        return name
     
-    base_code = language_code.split("-")[0]
-    if base_code in LANGUAGE_MAP:
-        return LANGUAGE_MAP[base_code]
-    
-    print(f"Warning: Unknown language '{language_code}', using English", flush=True)
+    logger.warning(f"Unknown language '{language_code}', using English")
     return "English"
 
-def language_translate(text: str, target_language: str = "en-IN") -> str:
+class BatchScheduler:
+    """
+    Coalesces model requests arriving within a short window into batches.
+    A single worker thread drains the queue, groups items by task and runs
+    each group sorted by length; translations to different targets share a
+    batch since every row has its own system prompt.
+    Detection requests are batched the same way, and identical texts share a row.
+    The worker is the only thread that runs the model.
+    """
+
+    def __init__(self, max_batch: int = MAX_BATCH, max_wait_ms: int = MAX_WAIT_MS):
+        self.queue = queue.Queue()
+        self.max_batch = max_batch
+        self.max_wait = max_wait_ms / 1000
+        self._worker = None
+        self._lock = threading.Lock()
+
+    def submit(self, text: str, target_language: str, source_language: str = None) -> Future:
+        """Queue a translation and return a Future for its result."""
+        return self._enqueue("translate", text, target_language, source_language)
+
+    def submit_detect(self, text: str) -> Future:
+        """Queue a language detection and return a Future for the language code."""
+        return self._enqueue("detect", text, None, None)
+
+    def _enqueue(self, task: str, text: str, target_language: str, source_language: str) -> Future:
+        self._ensure_worker()
+        future = Future()
+        self.queue.put((task, text, target_language, source_language, future))
+        return future
+
+    def _ensure_worker(self):
+        if self._worker is not None:
+            return
+        with self._lock:
+            if self._worker is None:
+                self._worker = threading.Thread(target=self._run, name="translate-batcher", daemon=True)
+                self._worker.start()
+
+    def _collect(self) -> list:
+        """Block for the first item, then gather more until the batch is full or the window closes."""
+        batch = [self.queue.get()]
+        deadline = time.monotonic() + self.max_wait
+        while len(batch) < self.max_batch:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self.queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self):
+        while True:
+            batch = self._collect()
+            groups = {}
+            for item in batch:
+                groups.setdefault(item[0], []).append(item)
+
+            for task, items in groups.items():
+                # Length-bucket so similarly sized inputs are processed together
+                items.sort(key=lambda item: len(item[1]))
+                if task == "detect":
+                    self._process_detect(items)
+                else:
+                    self._process(items)
+
+    def _process(self, items: list):
+        live = [item for item in items if item[4].set_running_or_notify_cancel()]
+        if not live:
+            return
+
+        texts = [item[1] for item in live]
+        # Each row carries its own target language in its system prompt
+        target_languages = [item[2] for item in live]
+        try:
+            results = language_translate_batch(texts, target_languages)
+        except Exception as e:
+            for item in live:
+                item[4].set_exception(e)
+            return
+
+        for item, translated_text in zip(live, results):
+            if translated_text:
+                item[4].set_result(translated_text)
+            else:
+                item[4].set_exception(Exception("Translation error: Translation returned empty result"))
+
+    def _process_detect(self, items: list):
+        waiting = {}
+        for _, text, _, _, future in items:
+            if future.set_running_or_notify_cancel():
+                waiting.setdefault(text, []).append(future)
+
+        if not waiting:
+            return
+        try:
+            language_codes = _detect_batch(list(waiting))
+        except Exception as e:
+            for futures in waiting.values():
+                for future in futures:
+                    future.set_exception(e)
+            return
+        for futures, language_code in zip(waiting.values(), language_codes):
+            for future in futures:
+                future.set_result(language_code)
+
+translation_scheduler = BatchScheduler()
+
+def language_translate(text: str, target_language: str = "en-IN", source_language: str = None) -> str:
     """
     Translates text from auto-detected language to a target language.
+    Requests are routed through the shared BatchScheduler; results are kept
+    in an in-process LRU keyed on the stripped text and target language.
     
     Args:
         text (str): Text to translate.
         target_language (str): Target language code (e.g., "en-IN", "hi").
+        source_language (str, optional): Source language code, if known by the caller.
         
     Returns:
         str: Translated text.
@@ -221,113 +746,352 @@ def language_translate(text: str, target_language: str = "en-IN") -> str:
     if not text or not isinstance(text, str) or not text.strip():
         raise ValueError("Text must be a non-empty string")
     
-    if "-" not in target_language:
-        target_language = f"{target_language}-IN"
+    target_language = normalize_language_code(target_language)
+    if source_language:
+        source_language = normalize_language_code(source_language)
+    
+    # Nothing to translate when the caller says the text is already in the target language
+    if _is_same_language(source_language, target_language):
+        return text
     
+    # Surrounding whitespace never survives translation, so it doesn't belong in the key
+    text = text.strip()
+    cache_key = hashlib.blake2b(f"{target_language}\x00{text}".encode(), digest_size=16).digest()
+    cached = _translate_cache.get(cache_key)
+    if cached is not None:
+        return cached
+    
+    # Load on this thread so the model load doesn't count against TRANSLATE_TIMEOUT
+    initialize_model()
+    future = translation_scheduler.submit(text, target_language, source_language)
+    translated_text = _wait_for(future)
+    if translated_text:
+        _translate_cache.put(cache_key, translated_text)
+    return translated_text
+
+def _wait_for(future: Future):
+    """Waits up to TRANSLATE_TIMEOUT for a scheduler result; cancels the item if it hasn't started."""
     try:
-        # Initialize model if needed
-        if model is None or tokenizer is None:
-            initialize_model()
-        
-        target_lang_name = get_language_name(target_language)
-        
-        print(f"\nTranslating to {target_lang_name}...", flush=True)
-        
-        # Create prompt
+        return future.result(timeout=TRANSLATE_TIMEOUT)
+    except FutureTimeoutError:
+        future.cancel()
+        raise
+
+def _is_same_language(source_language: str, target_language: str) -> bool:
+    """True when a caller-supplied source language has the same base code as the target."""
+    if not source_language:
+        return False
+    return source_language.partition("-")[0] == target_language.partition("-")[0]
+
+def _prompt_parts(tokenizer, system_prompt: str) -> tuple:
+    """
+    Returns (prefix_ids, suffix_ids) of the chat template around the user turn.
+    The template is rendered and tokenized once per system prompt and cached.
+    """
+    parts = _PROMPT_PARTS_CACHE.get(system_prompt)
+    if parts is None:
         messages = [
-            {"role": "system", "content": f"Translate the text below to {target_lang_name}."},
-            {"role": "user", "content": text}
+            {"role": "system", "content": system_prompt},
+            {"role": "user", "content": _USER_TEXT_MARKER}
         ]
-        
-        prompt_text = tokenizer.apply_chat_template(
+        rendered = tokenizer.apply_chat_template(
             messages,
             tokenize=False,
             add_generation_prompt=True
         )
-        
-        # Tokenize
-        model_inputs = tokenizer([prompt_text], return_tensors="pt").to(model.device)
-        
-        print("   Generating... (10-30 seconds on CPU)", flush=True)
-        start_time = time.time()
-        
-        # Generate translation
+        prefix, suffix = rendered.split(_USER_TEXT_MARKER)
+        parts = (
+            tokenizer(prefix).input_ids,
+            tokenizer(suffix, add_special_tokens=False).input_ids
+        )
+        _PROMPT_PARTS_CACHE[system_prompt] = parts
+    return parts
+
+def _encode_prompts(tokenizer, system_prompts: list, texts: list) -> list:
+    """
+    Builds the token ids of each chat prompt. Only the user texts are
+    tokenized per call; the template around them comes from _prompt_parts.
+    """
+    user_ids = tokenizer(texts, add_special_tokens=False).input_ids
+    sequences = []
+    for system_prompt, ids in zip(system_prompts, user_ids):
+        prefix_ids, suffix_ids = _prompt_parts(tokenizer, system_prompt)
+        sequences.append(prefix_ids + ids + suffix_ids)
+    return sequences
+
+def _stop_token_ids(tokenizer) -> list:
+    """Returns the EOS id plus any chat end-of-turn ids the tokenizer knows."""
+    global _STOP_TOKEN_IDS
+    if _STOP_TOKEN_IDS is None:
+        ids = [tokenizer.eos_token_id]
+        for token in ("<|im_end|>", "<end_of_turn>"):
+            token_id = tokenizer.convert_tokens_to_ids(token)
+            if token_id is not None and token_id != tokenizer.unk_token_id and token_id not in ids:
+                ids.append(token_id)
+        _STOP_TOKEN_IDS = ids
+    return _STOP_TOKEN_IDS
+
+def _translation_max_new_tokens(sequences: list) -> int:
+    """Decode budget scaled to the longest prompt: 2x its length plus slack, capped at 1024."""
+    return min(1024, max(len(ids) for ids in sequences) * 2 + 32)
+
+def _generate(model, tokenizer, sequences: list, max_new_tokens: int) -> list:
+    """
+    Greedy-decodes a batch of token-id prompts on the configured BACKEND.
+    Returns the decoded continuation (prompt excluded) for each prompt.
+    """
+    if BACKEND == "ctranslate2":
+        results = model.generate_batch(
+            [tokenizer.convert_ids_to_tokens(ids) for ids in sequences],
+            max_length=max_new_tokens,
+            sampling_topk=1,
+            end_token=tokenizer.convert_ids_to_tokens(_stop_token_ids(tokenizer)),
+            include_prompt_in_result=False,
+        )
+        return tokenizer.batch_decode([result.sequences_ids[0] for result in results], skip_special_tokens=True)
+    
+    if BACKEND == "vllm":
+        from vllm import SamplingParams
+        # vllm 0.2.x takes pre-tokenized prompts through prompt_token_ids
+        outputs = model.generate(
+            prompt_token_ids=sequences,
+            sampling_params=SamplingParams(max_tokens=max_new_tokens, temperature=0, stop_token_ids=_stop_token_ids(tokenizer)),
+            use_tqdm=False,
+        )
+        return [output.outputs[0].text for output in outputs]
+    
+    if BACKEND == "llamacpp":
+        # llama.cpp decodes one sequence at a time
+        return [
+            model.create_completion(ids, max_tokens=max_new_tokens, temperature=0)["choices"][0]["text"]
+            for ids in sequences
+        ]
+    
+    # transformers and onnx (optimum's ORTModel) share the generate() API
+    # Left-padded so every row ends where generation starts
+    model_inputs = tokenizer.pad({"input_ids": sequences}, return_tensors="pt").to(model.device)
+    try:
         with torch.no_grad():
             generated_ids = model.generate(
                 **model_inputs,
-                max_new_tokens=1024,
-                do_sample=True,
-                temperature=0.01,
-                num_return_sequences=1,
+                max_new_tokens=max_new_tokens,
+                do_sample=False,  # temperature 0.01 sampling was greedy in all but cost
+                num_beams=1,
+                eos_token_id=_stop_token_ids(tokenizer),
                 pad_token_id=tokenizer.eos_token_id,
                 use_cache=True
             )
+    except torch.cuda.OutOfMemoryError:
+        # Hand cached blocks back only when we actually ran out, not on every call
+        torch.cuda.empty_cache()
+        raise
+    
+    # Decode only the generated continuation of each row
+    prompt_len = model_inputs.input_ids.shape[1]
+    return tokenizer.batch_decode(generated_ids[:, prompt_len:], skip_special_tokens=True)
+
+def _translation_system_prompt(target_language: str) -> str:
+    return f"Translate the text below to {get_language_name(target_language)}."
+
+def language_translate_batch(texts: list, target_languages: list) -> list:
+    """
+    Translates several already-validated texts with a single generate() call.
+    Prompts are left-padded to a common length so every row decodes together.
+    
+    Args:
+        texts (list): Texts to translate.
+        target_languages (list): Normalized target language code for each text.
         
-        elapsed = time.time() - start_time
+    Returns:
+        list: Translated text for each input, in order (may contain empty strings).
+    """
+    try:
+        model, tokenizer = get_model()
         
-        # Decode
-        output_ids = generated_ids[0][len(model_inputs.input_ids[0]):].tolist()
-        translated_text = tokenizer.decode(output_ids, skip_special_tokens=True)
+        logger.debug("Translating batch of %d", len(texts))
         
-        # Cleanup
-        del model_inputs, generated_ids, output_ids
-        gc.collect()
+        system_prompts = [_translation_system_prompt(lang) for lang in target_languages]
         
-        if not translated_text or not isinstance(translated_text, str):
-            raise Exception("Translation returned empty result")
+        # Tokenize all prompts at once
+        sequences = _encode_prompts(tokenizer, system_prompts, texts)
         
-        print(f"✓ Done in {elapsed:.1f}s", flush=True)
-        return translated_text.strip()
+        start_time = time.time()
+        
+        # Generate translations
+        translated_texts = _generate(model, tokenizer, sequences, max_new_tokens=_translation_max_new_tokens(sequences))
+        
+        elapsed = time.time() - start_time
+        
+        logger.debug("Batch of %d done in %.1fs", len(texts), elapsed)
+        return [translated_text.strip() for translated_text in translated_texts]
         
     except Exception as e:
-        print(f"❌ Translation failed: {str(e)}", flush=True)
+        logger.error(f"Translation failed: {e}")
         raise Exception(f"Translation error: {str(e)}")
 
+def _detect_script(text: str):
+    """
+    Returns the language code when most letters of the text are in a script
+    only one supported language uses, else None.
+    """
+    counts = {}
+    letters = 0
+    for ch in text[:500]:
+        if ch.isalpha():
+            letters += 1
+            code = _SCRIPT_OF.get(ch)
+            if code is not None:
+                counts[code] = counts.get(code, 0) + 1
+    if not counts:
+        return None
+    
+    code, count = max(counts.items(), key=lambda item: item[1])
+    if count * 2 <= letters:
+        return None
+    if code == "bn" and not _ASSAMESE_LETTERS.isdisjoint(text[:500]):
+        return "as"
+    return code
+
+def _detect_fasttext(text: str):
+    """Returns the fastText prediction if confident and supported, else None. Needs FASTTEXT_LID_PATH."""
+    global _lid_model
+    if not FASTTEXT_LID_PATH:
+        return None
+    if _lid_model is None:
+        with _lid_lock:
+            if _lid_model is None:
+                import fasttext
+                _lid_model = fasttext.load_model(FASTTEXT_LID_PATH)
+    
+    labels, probs = _lid_model.predict(text[:500].replace("\n", " "))
+    if not labels or probs[0] < FASTTEXT_MIN_CONFIDENCE:
+        return None
+    code = labels[0].replace("__label__", "")
+    code = _FASTTEXT_LABELS.get(code, code)
+    return code if code in _BASE else None
+
 def detect_language(text: str) -> str:
-    """Detect the language of input text."""
+    """
+    Detect the language of input text. Unambiguous scripts and confident
+    fastText predictions skip the model; model results are kept in an in-process LRU.
+    Falls back to "en" when the model fails.
+    """
     if not text or not isinstance(text, str) or not text.strip():
         raise ValueError("Text must be a non-empty string")
 
     try:
-        if model is None or tokenizer is None:
-            initialize_model()
-        
-        messages = [
-            {"role": "system", "content": "Identify the language of the following text. Respond with only the language name."},
-            {"role": "user", "content": text[:500]}
-        ]
-        
-        prompt_text = tokenizer.apply_chat_template(
-            messages,
-            tokenize=False,
-            add_generation_prompt=True
-        )
-        
-        model_inputs = tokenizer([prompt_text], return_tensors="pt").to(model.device)
-        
-        with torch.no_grad():
-            generated_ids = model.generate(
-                **model_inputs,
-                max_new_tokens=50,
-                do_sample=True,
-                temperature=0.01,
-                num_return_sequences=1,
-                pad_token_id=tokenizer.eos_token_id
-            )
-        
-        output_ids = generated_ids[0][len(model_inputs.input_ids[0]):].tolist()
-        detected_name = tokenizer.decode(output_ids, skip_special_tokens=True).strip()
-        
-        del model_inputs, generated_ids, output_ids
-        gc.collect()
-        
-        language_code = REVERSE_LANGUAGE_MAP.get(detected_name.lower(), "en")
-        print(f"Detected: {language_code} ({detected_name})", flush=True)
+        return _detect_language_or_raise(text)
+    except Exception as e:
+        logger.error(f"Language detection failed: {e}, defaulting to English")
+        return "en"
+
+def _detect_language_or_raise(text: str) -> str:
+    """detect_language without the English fallback: model failures raise."""
+    language_code = _detect_script(text)
+    if language_code is not None:
         return language_code
+    
+    try:
+        language_code = _detect_fasttext(text)
+    except Exception as e:
+        logger.warning(f"fastText language ID failed: {e}")
+    if language_code is not None:
+        return language_code
+
+    cache_key = hashlib.blake2b(text.encode(), digest_size=16).digest()
+    cached = _detect_cache.get(cache_key)
+    if cached is not None:
+        return cached
+
+    initialize_model()
+    future = translation_scheduler.submit_detect(text)
+    language_code = _wait_for(future)
+
+    _detect_cache.put(cache_key, language_code)
+    return language_code
 
+def _detect_batch(texts: list) -> list:
+    """Runs the model to identify the language of each text in one generate() call. Raises on failure."""
+    model, tokenizer = get_model()
+    
+    sequences = _encode_prompts(tokenizer, [DETECT_SYSTEM_PROMPT] * len(texts), [text[:500] for text in texts])
+    # A language name is only a few tokens
+    detected_names = _generate(model, tokenizer, sequences, max_new_tokens=8)
+    
+    language_codes = []
+    for detected_name in detected_names:
+        detected_name = detected_name.strip()
+        language_code = REVERSE_LANGUAGE_MAP.get(detected_name.lower(), "en")
+        logger.debug("Detected: %s (%s)", language_code, detected_name)
+        language_codes.append(language_code)
+    return language_codes
+
+def redis_call(action: str, fn, default=None):
+    """
+    Runs fn(redis_client) and returns its result, or default when Redis fails.
+    A connection failure is logged once and Redis is then skipped for
+    REDIS_RETRY_SECONDS, so an absent Redis costs nothing per request.
+    """
+    global _redis_down_until
+    if time.monotonic() < _redis_down_until:
+        return default
+    try:
+        return fn(redis_client)
+    except (redis.ConnectionError, redis.TimeoutError) as e:
+        _redis_down_until = time.monotonic() + REDIS_RETRY_SECONDS
+        logger.warning(f"Redis unavailable, skipping it for {REDIS_RETRY_SECONDS:g}s: {e}")
+    except redis.RedisError as e:
+        logger.warning(f"Redis {action} failed: {e}")
+    return default
+
+def cache_get_or_set(key: str, ttl: int, fn):
+    """
+    Returns the cached value for key, computing and storing it with fn() on a miss.
+    Redis errors are logged and treated as a miss so requests still succeed.
+
+    Returns:
+        tuple: (value, cache_hit)
+    """
+    cached = redis_call("cache read", lambda client: client.get(key))
+    if cached is not None:
+        return cached, True
+
+    value = fn()
+
+    redis_call("cache write", lambda client: client.setex(key, ttl, value))
+
+    return value, False
+
+def cached_language_translate(text: str, target_language: str = "en-IN", source_language: str = None):
+    """
+    Cached variant of language_translate. Returns (translated_text, cache_hit).
+    Same-language requests return the text as-is and never touch Redis, since
+    the key doesn't include the source language.
+    """
+    if _is_same_language(source_language, target_language):
+        return language_translate(text, target_language=target_language, source_language=source_language), False
+    
+    # Same key for "hi" and "hi-IN", matching the in-process LRU
+    key = "tr:" + hashlib.sha256(f"{normalize_language_code(target_language)}\x00{text}".encode()).hexdigest()
+    return cache_get_or_set(
+        key, CACHE_TTL,
+        lambda: language_translate(text, target_language=target_language, source_language=source_language)
+    )
+
+def cached_detect_language(text: str):
+    """
+    Cached variant of detect_language. Returns (language_code, cache_hit).
+    Only real detections are stored; failures fall back to "en" uncached.
+    """
+    if not text or not isinstance(text, str) or not text.strip():
+        raise ValueError("Text must be a non-empty string")
+
+    key = "ld:" + hashlib.sha256(text.encode()).hexdigest()
+    try:
+        return cache_get_or_set(key, CACHE_TTL, lambda: _detect_language_or_raise(text))
     except Exception as e:
-        print(f"Language detection failed: {e}, defaulting to English", flush=True)
-        return "en"
+        logger.error(f"Language detection failed: {e}, defaulting to English")
+        return "en", False
 
 def check_translation_service_health() -> bool:
     """Check if translation service is working."""
@@ -336,7 +1100,7 @@ def check_translation_service_health() -> bool:
         result = language_translate("Hello", target_language="hi")
         return bool(result and len(result.strip()) > 0)
     except Exception as e:
-        print(f"Health check failed: {e}", flush=True)
+        logger.warning(f"Health check failed: {e}")
         return False
 
 def quick_test():